@@ -1,13 +1,19 @@
+import functools
 import json
 import logging
+import math
+import mmap
 import os
 import signal
 import socket
 import sys
+import threading
 import time
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from types import FrameType
 from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
 
 import numpy as np
 import paho.mqtt.client as mqtt
@@ -24,6 +30,12 @@ try:
 except ImportError:
     TimezoneFinder = None
 
+# Optional JIT for the daily spectrum reduction
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 MQTT_HOST: str = str(os.environ.get("MQTT_HOST", "")).strip()
 MQTT_PORT: int = int(os.environ.get("MQTT_PORT", 1883))
 MQTT_USERNAME: str = str(os.environ.get("MQTT_USERNAME", "")).strip()
@@ -33,6 +45,10 @@ DISCOVERY_PREFIX: str = str(os.environ.get("DISCOVERY_PREFIX", "homeassistant"))
 BASE_TOPIC: str = str(os.environ.get("BASE_TOPIC", "fake_time")).strip()
 LIGHT_CMD_TOPIC: str = str(os.environ.get("LIGHT_CMD_TOPIC", "zigbee2mqtt/Chicken Coop Light/set")).strip()
 
+STATUS_TOPIC: str = f"{BASE_TOPIC}/status"
+PHASE_TOPIC: str = f"{BASE_TOPIC}/phase"
+AVAILABILITY_TOPIC: str = f"{BASE_TOPIC}/availability"
+
 DEVICE = {
     "identifiers": ["chicken-lights-controller"],
     "name": "Chicken Lights Controller",
@@ -40,18 +56,75 @@ DEVICE = {
     "model": "pvlib-spectrl2",
 }
 
+# Home Assistant discovery configs; serialized once, re-published on every connect
+DISCOVERY: list[tuple[str, str]] = [
+    (
+        f"{DISCOVERY_PREFIX}/sensor/chicken_lights/fake_time/config",
+        json.dumps({
+            "name": "Chicken Lights Fake Time",
+            "unique_id": "chicken_lights_fake_time",
+            "icon": "mdi:calendar-clock",
+            "device_class": "timestamp",
+            "state_topic": BASE_TOPIC,
+            "availability_topic": AVAILABILITY_TOPIC,
+            "qos": 1,
+            "device": DEVICE,
+            "json_attributes_topic": STATUS_TOPIC,
+        }),
+    ),
+    (
+        f"{DISCOVERY_PREFIX}/sensor/chicken_lights/phase/config",
+        json.dumps({
+            "name": "Chicken Lights Phase",
+            "unique_id": "chicken_lights_phase",
+            "icon": "mdi:state-machine",
+            "state_topic": PHASE_TOPIC,
+            "availability_topic": AVAILABILITY_TOPIC,
+            "qos": 1,
+            "device": DEVICE,
+        }),
+    ),
+    (
+        f"{DISCOVERY_PREFIX}/sensor/chicken_lights/brightness/config",
+        json.dumps({
+            "name": "Chicken Lights Brightness",
+            "unique_id": "chicken_lights_brightness",
+            "icon": "mdi:brightness-6",
+            "state_topic": STATUS_TOPIC,
+            "value_template": "{{ value_json.brightness|int }}",
+            "unit_of_measurement": "/254",
+            "availability_topic": AVAILABILITY_TOPIC,
+            "qos": 1,
+            "device": DEVICE,
+        }),
+    ),
+]
+
+# Per-minute payloads; all fields are numbers or plain strings, so these are
+# formatted directly instead of going through json.dumps every tick
+LIGHT_PAYLOAD: str = '{{"state":"on","color":{{"x":{x},"y":{y}}},"brightness":{b}}}'
+STATUS_PAYLOAD: str = '{{"x":{x},"y":{y},"brightness":{b},"ts":"{ts}","lat":{lat},"lon":{lon},"alt_m":{alt}}}'
+
 LATITUDE: float = float(os.environ.get("LATITUDE", 0))
 LONGITUDE: float = float(os.environ.get("LONGITUDE", 0))
 ALTITUDE: float = float(os.environ.get("ALTITUDE", 0))
 
 TZ: str = str(os.environ.get("TZ", "UTC")).strip()
 
+# Wavelength grid of the CIE colour matching function (see colour_system.py)
+LAM: np.ndarray = np.arange(380.0, 781.0, 5)
+
 # Optional: fetch coordinates from remote gpsd
 GPSD_HOST: str = str(os.environ.get("GPSD_HOST", "")).strip()
 GPSD_PORT: int = int(os.environ.get("GPSD_PORT", 2947))
 GPSD_TIMEOUT_S: int = int(os.environ.get("GPSD_TIMEOUT", 5))
 GPSD_REFRESH_S: int = int(os.environ.get("GPSD_REFRESH", 900))  # periodic refresh while active
 
+CACHE_DIR: Path = Path(os.environ.get("CACHE_DIR", "/tmp/chicken_lights_cache"))
+STATE_FILE: str = "/tmp/chicken_lights_state"  # read by healthcheck.py
+STATE_SIZE: int = 4096
+SPECTRUM_STEP_MIN: int = max(1, int(os.environ.get("SPECTRUM_STEP", 10)))  # minutes between spectrl2 samples
+
 MQTT_KEEPALIVE_S: int = int(os.environ.get("MQTT_KEEPALIVE", 300))
 CLIENT_ID: str = str(os.environ.get("MQTT_CLIENT_ID", f"chicken-lights-{socket.gethostname()}")).strip()
 
@@ -65,8 +138,29 @@ CLIENT.reconnect_delay_set(min_delay=1, max_delay=60)
 
 logging.basicConfig(format="%(asctime)s [%(levelname)s]: %(message)s", level=logging.DEBUG)
 
-_connected: bool = False
+_connected = threading.Event()
 _tz_finder: Optional[TimezoneFinder] = TimezoneFinder() if TimezoneFinder is not None else None
+_loc_cache: dict[tuple[float, float, float, str], tuple[suntimes.SunTimes, location.Location]] = {}
+
+
+def _open_state() -> mmap.mmap:
+    fd = os.open(STATE_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, STATE_SIZE)
+        return mmap.mmap(fd, STATE_SIZE)
+    finally:
+        os.close(fd)
+
+
+_state: mmap.mmap = _open_state()
+_state_fields: dict[str, int | str] = {}
+
+
+def write_state(**fields: int | str) -> None:
+    """Update the phase/next_wake/last_tick record shared with healthcheck.py."""
+    _state_fields.update(fields)
+    record = "".join(f"{k}={v}\n" for k, v in _state_fields.items()).encode()
+    _state[:] = record.ljust(STATE_SIZE, b"\0")
 
 
 def get_fix_from_gpsd(host: str, port: int = 2947, timeout_s: int = 5) -> Optional[Tuple[float, float, float]]:
@@ -75,7 +169,9 @@ def get_fix_from_gpsd(host: str, port: int = 2947, timeout_s: int = 5) -> Option
         return None
 
     deadline = time.time() + max(1, timeout_s)
-    buf = b""
+    buf = bytearray(65536)
+    view = memoryview(buf)
+    end = 0  # bytes currently buffered
 
     try:
         with socket.create_connection((host, port), timeout=2) as s:
@@ -84,15 +180,18 @@ def get_fix_from_gpsd(host: str, port: int = 2947, timeout_s: int = 5) -> Option
 
             while time.time() < deadline:
                 try:
-                    chunk = s.recv(4096)
-                    if not chunk:
+                    n = s.recv_into(view[end:])
+                    if not n:
                         break
-                    buf += chunk
-
-                    while b"\n" in buf:
-                        line, buf = buf.split(b"\n", 1)
-                        line = line.strip()
-                        if not line:
+                    scan = end  # the buffered partial line has no newline
+                    end += n
+
+                    start = 0
+                    while (nl := buf.find(b"\n", scan, end)) != -1:
+                        line = bytes(view[start:nl]).strip()
+                        start = scan = nl + 1
+                        # Only TPV reports carry a fix; skip VERSION/DEVICES/SKY unparsed
+                        if not line or b'"TPV"' not in line:
                             continue
                         try:
                             msg = json.loads(line.decode("utf-8", errors="ignore"))
@@ -111,6 +210,12 @@ def get_fix_from_gpsd(host: str, port: int = 2947, timeout_s: int = 5) -> Option
                             alt_m = float(alt) if (alt is not None and mode >= 3) else 0.0
                             return float(lat), float(lon), alt_m
 
+                    # Keep the trailing partial line; drop it if it fills the buffer
+                    view[: end - start] = view[start:end]
+                    end -= start
+                    if end == len(buf):
+                        end = 0
+
                 except socket.timeout:
                     continue
 
@@ -136,76 +241,46 @@ def lookup_timezone(lat: float, lon: float) -> Optional[str]:
     return None
 
 
+def sun_and_location(lat: float, lon: float, alt: float, tz: str) -> Tuple[suntimes.SunTimes, location.Location]:
+    """Return (SunTimes, pvlib Location) for the coordinates, reusing earlier ones."""
+    key = (round(lat, 3), round(lon, 3), round(alt, 0), tz)
+    if key not in _loc_cache:
+        _loc_cache[key] = (suntimes.SunTimes(lon, lat, alt), location.Location(lat, lon, tz, alt, "Home"))
+    return _loc_cache[key]
+
+
+def sleep_until(deadline: float, max_step: float = 60) -> None:
+    """Sleep until the wall-clock time deadline (seconds since the epoch).
+
+    Sleeps in chunks of at most max_step seconds and re-reads the clock each
+    time, so a clock step (NTP, suspend) doesn't make a long sleep drift.
+    """
+    while (remaining := deadline - time.time()) > 0:
+        time.sleep(min(remaining, max_step))
+
+
 def on_connect(client, userdata, flags, rc, properties=None):
-    global _connected
     if rc == 0:
-        _connected = True
+        _connected.set()
         logging.info("MQTT connected (client_id=%s)", CLIENT_ID)
 
         # Availability + discovery are best re-published on every connect (retained).
-        CLIENT.publish(f"{BASE_TOPIC}/availability", "online", qos=1, retain=True)
-
-        CLIENT.publish(
-            f"{DISCOVERY_PREFIX}/sensor/chicken_lights/fake_time/config",
-            json.dumps({
-                "name": "Chicken Lights Fake Time",
-                "unique_id": "chicken_lights_fake_time",
-                "icon": "mdi:calendar-clock",
-                "device_class": "timestamp",
-                "state_topic": BASE_TOPIC,
-                "availability_topic": f"{BASE_TOPIC}/availability",
-                "qos": 1,
-                "device": DEVICE,
-                "json_attributes_topic": f"{BASE_TOPIC}/status",
-            }),
-            retain=True,
-            qos=1,
-        )
-
-        CLIENT.publish(
-            f"{DISCOVERY_PREFIX}/sensor/chicken_lights/phase/config",
-            json.dumps({
-                "name": "Chicken Lights Phase",
-                "unique_id": "chicken_lights_phase",
-                "icon": "mdi:state-machine",
-                "state_topic": f"{BASE_TOPIC}/phase",
-                "availability_topic": f"{BASE_TOPIC}/availability",
-                "qos": 1,
-                "device": DEVICE,
-            }),
-            retain=True,
-            qos=1,
-        )
+        CLIENT.publish(AVAILABILITY_TOPIC, "online", qos=1, retain=True)
 
-        CLIENT.publish(
-            f"{DISCOVERY_PREFIX}/sensor/chicken_lights/brightness/config",
-            json.dumps({
-                "name": "Chicken Lights Brightness",
-                "unique_id": "chicken_lights_brightness",
-                "icon": "mdi:brightness-6",
-                "state_topic": f"{BASE_TOPIC}/status",
-                "value_template": "{{ value_json.brightness|int }}",
-                "unit_of_measurement": "/254",
-                "availability_topic": f"{BASE_TOPIC}/availability",
-                "qos": 1,
-                "device": DEVICE,
-            }),
-            retain=True,
-            qos=1,
-        )
+        for topic, payload in DISCOVERY:
+            CLIENT.publish(topic, payload, retain=True, qos=1)
     else:
         logging.warning("MQTT connect failed rc=%s", rc)
 
 
 def on_disconnect(client, userdata, rc, properties=None):
-    global _connected
-    _connected = False
+    _connected.clear()
     logging.warning("MQTT disconnected rc=%s", rc)
 
 
 def handler(signum: int, frame: FrameType | None):
     try:
-        CLIENT.publish(f"{BASE_TOPIC}/availability", "offline", qos=1, retain=True)
+        CLIENT.publish(AVAILABILITY_TOPIC, "offline", qos=1, retain=True)
     except Exception:
         pass
     CLIENT.disconnect()
@@ -216,56 +291,119 @@ def handler(signum: int, frame: FrameType | None):
 signal.signal(signal.SIGINT, handler)
 
 
-def publish_day():
-
-    lat, lon, alt = LATITUDE, LONGITUDE, ALTITUDE
-    tz = TZ
-
-    # Get a fresh gpsd fix at the start of the day (if configured)
-    if GPSD_HOST:
-        fix = get_fix_from_gpsd(GPSD_HOST, GPSD_PORT, GPSD_TIMEOUT_S)
-        if fix:
-            lat, lon, alt = fix
-            logging.info("Using gpsd fix: lat=%s lon=%s alt=%sm", lat, lon, alt)
-            gps_tz = lookup_timezone(lat, lon)
-            if gps_tz:
-                tz = gps_tz
-                logging.info("Using timezone from gpsd fix: %s", tz)
-        else:
-            logging.warning("gpsd configured but no fix, using env LAT/LON/ALT")
-    last_gpsd_check = time.time()
-
-    logging.info("Active timezone: %s", tz)
-
-    today = pd.Timestamp.today(tz=tz)
-    logging.info("Today is %s", today)
-
-    sun = suntimes.SunTimes(lon, lat, alt)
-    logging.info("Sun: %s", sun)
-
-    sunrise = pd.Timestamp(sun.riselocal(today)).tz_convert(tz)
-    sunset = pd.Timestamp(sun.setlocal(today)).tz_convert(tz)
+if njit is not None:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _day_curves_jit(poa, idx, w, cmf):
+        # Interpolation, norm and XYZ in one pass; the resampled spectrum
+        # is never stored.
+        n = poa.shape[0]
+        xyz = np.empty((n, 3))
+        norms = np.empty(n)
+        for i in prange(n):
+            norm2 = 0.0
+            X = 0.0
+            Y = 0.0
+            Z = 0.0
+            for k in range(idx.size):
+                j = idx[k]
+                f = poa[i, j] + w[k] * (poa[i, j + 1] - poa[i, j])
+                norm2 += f * f
+                X += f * cmf[k, 0]
+                Y += f * cmf[k, 1]
+                Z += f * cmf[k, 2]
+            den = X + Y + Z
+            if den != 0.0:
+                X /= den
+                Y /= den
+                Z /= den
+            xyz[i, 0] = X
+            xyz[i, 1] = Y
+            xyz[i, 2] = Z
+            norms[i] = np.sqrt(norm2)
+        return xyz, norms
+
+else:
+    _day_curves_jit = None
+
+
+def interp_weights(wl: np.ndarray, lam: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (idx, w) such that np.interp(lam, wl, f) == f[idx] + w * (f[idx + 1] - f[idx])."""
+    idx = np.clip(np.searchsorted(wl, lam) - 1, 0, len(wl) - 2)
+    w = (lam - wl[idx]) / (wl[idx + 1] - wl[idx])
+    return idx, w
+
+
+def interp_matrix(wl: np.ndarray, lam: np.ndarray) -> np.ndarray:
+    """Return W, shape (len(wl), len(lam)), such that f @ W == np.interp(lam, wl, f)."""
+    idx, w = interp_weights(wl, lam)
+    cols = np.arange(lam.size)
+    W = np.zeros((len(wl), lam.size), dtype=np.float32)
+    W[idx, cols] = 1 - w
+    W[idx + 1, cols] = w
+    return W
+
+
+def day_curves(wl: np.ndarray, poa: np.ndarray, lam: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Resample each column of poa onto lam and return (xyz, norm) per column."""
+    # One contiguous float32 row per time step: the values only feed an 8-bit
+    # brightness and 4-decimal xy, and rows are what both paths walk.
+    poa = np.ascontiguousarray(poa.T, dtype=np.float32)
+
+    if _day_curves_jit is not None:
+        idx, w = interp_weights(wl, lam)
+        return _day_curves_jit(poa, idx, w, CS_HDTV.cmf)
+
+    spec = poa @ interp_matrix(wl, lam)
+
+    return CS_HDTV.spec_to_xyz_batch(spec), np.linalg.norm(spec, axis=1)
+
+
+@functools.lru_cache(maxsize=8)
+def compute_day_frame(date_iso: str, lat: float, lon: float, alt: float, tz: str) -> pd.DataFrame:
+    """Return the fake-day schedule (Fake Time, X, Y, Brightness) for a date.
+
+    The schedule only depends on the arguments, so it is memoized in-process
+    and pickled under CACHE_DIR so a restart later the same day skips pvlib.
+    """
+    cache_file = CACHE_DIR / f"{date_iso}_{lat}_{lon}_{alt}_{tz.replace('/', '-')}_{SPECTRUM_STEP_MIN}.pkl"
+    try:
+        df = pd.read_pickle(cache_file)
+        logging.info("Loaded day schedule from %s", cache_file)
+        return df
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning("Ignoring unreadable day cache %s: %s", cache_file, e)
 
-    logging.info("Sunrise today: %s", sunrise)
-    logging.info("Sunset today: %s", sunset)
+    today = pd.Timestamp(date_iso, tz=tz)
 
     dl = today.replace(month=6, day=21)
     ds = today.replace(month=12, day=21)
 
     dsp = today.replace(month=8, day=15)
 
-    todayp = (dl - dsp) / 2 * (np.cos(np.pi * (dl - today) / (dl - ds)) + 1) + dsp
+    frac = 0.5 * (math.cos(math.pi * ((dl - today) / (dl - ds))) + 1)
+    todayp = (dl - dsp) * frac + dsp
 
     start_time = todayp.replace(hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
     end_time = todayp.replace(hour=23, minute=59, second=59)
 
     times = pd.date_range(start_time, end_time, freq="1min", tz=tz)
 
-    loc = location.Location(lat, lon, tz, alt, "Home")
+    _, loc = sun_and_location(lat, lon, alt, tz)
     logging.info(loc)
 
     solpos = loc.get_solarposition(times)
 
+    # Only daylight minutes are scheduled (spectrl2 is NaN past 90 degrees).
+    # spectrl2 dominates the cost, so only evaluate it every SPECTRUM_STEP_MIN
+    # minutes plus the last daylight minute (keeping the length of the day
+    # exact) and interpolate the colour and brightness in between.
+    daylight = times[solpos.apparent_zenith.to_numpy() <= 90]
+    samples = daylight[::SPECTRUM_STEP_MIN].union(daylight[-1:])
+    solpos = solpos.loc[samples]
+
     relative_airmass = atmosphere.get_relative_airmass(solpos.apparent_zenith)
 
     spectra = spectrum.spectrl2(
@@ -280,27 +418,71 @@ def publish_day():
         aerosol_turbidity_500nm=0.1,
     )
 
-    lam = np.arange(380.0, 781.0, 5)
-    spec = np.array([np.interp(lam, spectra["wavelength"], spectra["poa_global"][:, i]) for i in range(len(times))])
+    xyz, norms = day_curves(spectra["wavelength"], spectra["poa_global"], LAM)
 
-    norms = np.array([np.linalg.norm(v) for v in spec])
     nanmax = np.nanmax(norms)
     logging.info("Max. irradiance: %s", nanmax)
-    brights = norms / nanmax
-
-    spec = np.array([CS_HDTV.spec_to_xyz(s) for s in spec])
+    brights = np.divide(norms, nanmax, out=norms)
 
     df = pd.DataFrame(
         {
-            "Fake Time": times,
-            "X": spec[:, 0],
-            "Y": spec[:, 1],
+            "X": xyz[:, 0],
+            "Y": xyz[:, 1],
             "Brightness": brights,
         },
-        index=times,
+        index=samples,
     )
 
-    df.dropna(inplace=True)
+    df = df.reindex(daylight).interpolate(method="time")
+    df.insert(0, "Fake Time", daylight)
+
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for old in CACHE_DIR.glob("*.pkl"):
+            if not old.name.startswith(date_iso):
+                old.unlink()
+        df.to_pickle(cache_file)
+    except OSError as e:
+        logging.warning("Could not write day cache %s: %s", cache_file, e)
+
+    return df
+
+
+def publish_day():
+
+    lat, lon, alt = LATITUDE, LONGITUDE, ALTITUDE
+    tz = TZ
+
+    # Get a fresh gpsd fix at the start of the day (if configured)
+    if GPSD_HOST:
+        fix = get_fix_from_gpsd(GPSD_HOST, GPSD_PORT, GPSD_TIMEOUT_S)
+        if fix:
+            lat, lon, alt = fix
+            logging.info("Using gpsd fix: lat=%s lon=%s alt=%sm", lat, lon, alt)
+            gps_tz = lookup_timezone(lat, lon)
+            if gps_tz:
+                tz = gps_tz
+                logging.info("Using timezone from gpsd fix: %s", tz)
+        else:
+            logging.warning("gpsd configured but no fix, using env LAT/LON/ALT")
+    last_gpsd_check = time.time()
+
+    logging.info("Active timezone: %s", tz)
+
+    today = pd.Timestamp.today(tz=tz)
+    logging.info("Today is %s", today)
+
+    sun, _ = sun_and_location(lat, lon, alt, tz)
+    logging.info("Sun: %s", sun)
+
+    sunrise = pd.Timestamp(sun.riselocal(today)).tz_convert(tz)
+    sunset = pd.Timestamp(sun.setlocal(today)).tz_convert(tz)
+
+    logging.info("Sunrise today: %s", sunrise)
+    logging.info("Sunset today: %s", sunset)
+
+    # Coordinates are rounded (~100 m, 1 m) so gpsd jitter still hits the cache
+    df = compute_day_frame(today.date().isoformat(), round(lat, 3), round(lon, 3), round(alt, 0), tz)
 
     delta_time = df.index[-1] - df.index[0]
     logging.info("Length of fake day: %s", delta_time)
@@ -326,18 +508,24 @@ def publish_day():
         )
         # Announce sleep phase and next wake for healthcheck
         next_wake = (now + delay).timestamp()
-        CLIENT.publish(f"{BASE_TOPIC}/phase", "sleep", qos=1, retain=True)
-        Path("/tmp/phase").write_text("sleep")
-        Path("/tmp/next_wake").write_text(str(int(next_wake)))
-        time.sleep(delay.total_seconds())
+        CLIENT.publish(PHASE_TOPIC, "sleep", qos=1, retain=True)
+        write_state(phase="sleep", next_wake=int(next_wake))
+        sleep_until(next_wake)
+
+    CLIENT.publish(PHASE_TOPIC, "active", qos=1, retain=True)
+    write_state(phase="active", last_tick=int(time.time()))
+
+    fake_times = [t.isoformat().encode() for t in df["Fake Time"]]
+    xs = np.round(df["X"].to_numpy(), 4).tolist()
+    ys = np.round(df["Y"].to_numpy(), 4).tolist()
+    brights = np.clip(np.rint(df["Brightness"].to_numpy() * 254), 1, 254).astype(np.uint8).tolist()
+    light_payloads = [LIGHT_PAYLOAD.format(x=x, y=y, b=b).encode() for x, y, b in zip(xs, ys, brights)]
 
-    CLIENT.publish(f"{BASE_TOPIC}/phase", "active", qos=1, retain=True)
-    Path("/tmp/phase").write_text("active")
-    Path("/tmp/last_tick").write_text(str(int(time.time())))
+    tz_info = ZoneInfo(tz)
 
-    for idx, row in df.iterrows():
-        while pd.Timestamp.now().second % 60 != 0:
-            time.sleep(0.5)
+    for i in range(len(df)):
+        # Wait for the top of the next minute
+        sleep_until((time.time() // 60 + 1) * 60)
 
         # Periodic gpsd refresh while active (does not recompute the schedule;
         # it just updates what we report in status so you can confirm it's correct)
@@ -350,40 +538,30 @@ def publish_day():
             else:
                 logging.warning("gpsd refresh failed, keeping previous location")
 
-        CLIENT.publish(
-            LIGHT_CMD_TOPIC,
-            json.dumps({
-                "state": "on",
-                "color": {"x": float(f"{row['X']:.4f}"), "y": float(f"{row['Y']:.4f}")},
-                "brightness": max(int(row["Brightness"] * 254), 1),
-            }),
-            qos=1,
-        )
-        CLIENT.publish(BASE_TOPIC, row["Fake Time"].isoformat(), qos=1)
-
-        CLIENT.publish(
-            f"{BASE_TOPIC}/status",
-            json.dumps({
-                "x": float(f"{row['X']:.4f}"),
-                "y": float(f"{row['Y']:.4f}"),
-                "brightness": max(int(row["Brightness"] * 254), 1),
-                "ts": pd.Timestamp.now(tz=tz).isoformat(),
-                "lat": lat,
-                "lon": lon,
-                "alt_m": alt,
-            }),
-            qos=1,
+        status = STATUS_PAYLOAD.format(
+            x=xs[i],
+            y=ys[i],
+            b=brights[i],
+            ts=datetime.now(tz_info).isoformat(timespec="seconds"),
+            lat=lat,
+            lon=lon,
+            alt=alt,
         )
 
-        # tick files for healthcheck
-        Path("/tmp/last_tick").write_text(str(int(time.time())))
+        # Per-minute updates are periodic state superseded by the next tick,
+        # so they go out at qos=0; only the final "off" command is qos=1.
+        # Payloads are ready beforehand so the three publishes go out together.
+        CLIENT.publish(LIGHT_CMD_TOPIC, light_payloads[i], qos=0)
+        CLIENT.publish(BASE_TOPIC, fake_times[i], qos=0)
+        CLIENT.publish(STATUS_TOPIC, status, qos=0)
 
-        time.sleep(1)
+        # tick for healthcheck
+        write_state(last_tick=int(time.time()))
 
-    CLIENT.publish(LIGHT_CMD_TOPIC, json.dumps({"state": "off"}), qos=1)
+    CLIENT.publish(LIGHT_CMD_TOPIC, '{"state":"off"}', qos=1)
 
-    CLIENT.publish(f"{BASE_TOPIC}/phase", "idle", qos=1, retain=True)
-    Path("/tmp/phase").write_text("idle")
+    CLIENT.publish(PHASE_TOPIC, "idle", qos=1, retain=True)
+    write_state(phase="idle")
 
 
 def main():
@@ -392,7 +570,7 @@ def main():
 
     CLIENT.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
 
-    CLIENT.will_set(f"{BASE_TOPIC}/availability", "offline", qos=1, retain=True)
+    CLIENT.will_set(AVAILABILITY_TOPIC, "offline", qos=1, retain=True)
 
     CLIENT.on_connect = on_connect
     CLIENT.on_disconnect = on_disconnect
@@ -406,24 +584,20 @@ def main():
     CLIENT.loop_start()
 
     # Wait briefly for the initial connect
-    start = time.time()
-    while not _connected and time.time() - start < 30:
-        time.sleep(0.2)
+    _connected.wait(timeout=30)
 
-    old_day = pd.Timestamp.today().date() - pd.Timedelta(days=1)
     while True:
-        logging.info("    old_day: %s", old_day)
-        today = pd.Timestamp.today().date()
-        logging.info("    today: %s", today)
-        logging.info("        today - old_day = %s", today - old_day)
-        if today - old_day >= pd.Timedelta(days=1):
-            old_day = today
-            if _connected:
-                publish_day()
-            else:
-                logging.warning("MQTT not connected, skipping day run")
-        time.sleep(60)
+        today = date.today()
+        logging.debug("    today: %s", today)
+        if _connected.is_set():
+            publish_day()
+        else:
+            logging.warning("MQTT not connected, skipping day run")
 
+        # Sleep until just after the next local midnight
+        next_day = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        logging.info("Next day run at %s", next_day)
+        sleep_until(next_day.timestamp() + 1, max_step=3600)
 
 if __name__ == "__main__":
 
@@ -79,11 +79,19 @@ class ColourSystem:
 
         """
 
-        XYZ = np.sum(spec[:, np.newaxis] * self.cmf, axis=0)
-        den = np.sum(XYZ)
-        if den == 0.0:
-            return XYZ
-        return XYZ / den
+        return self.spec_to_xyz_batch(spec[np.newaxis, :])[0]
+
+    def spec_to_xyz_batch(self, specs):
+        """Convert an array of spectra, shape (N, 81), to xyz points.
+
+        Equivalent to calling spec_to_xyz on each row, but done as a single
+        matrix product against self.cmf.
+
+        """
+
+        XYZ = specs @ self.cmf
+        den = XYZ.sum(axis=1, keepdims=True)
+        return np.divide(XYZ, den, out=XYZ, where=den != 0.0)
 
     def spec_to_rgb(self, spec, out_fmt=None):
         """Convert a spectrum to an rgb value."""
@@ -3,29 +3,33 @@ import sys
 import time
 from pathlib import Path
 
+STATE_FILE = "/tmp/chicken_lights_state"
 
-def read_int(path: str) -> int | None:
+
+def read_state(path: str) -> dict[str, str]:
     try:
-        return int(Path(path).read_text().strip())
+        text = Path(path).read_bytes().rstrip(b"\0").decode()
     except Exception:
-        return None
+        return {}
+    return dict(line.split("=", 1) for line in text.splitlines() if "=" in line)
 
 
-def read_str(path: str) -> str | None:
+def to_int(value: str | None) -> int | None:
     try:
-        return Path(path).read_text().strip()
-    except Exception:
+        return int(value)
+    except (TypeError, ValueError):
         return None
 
 
 def main() -> int:
     now = int(time.time())
 
-    phase = read_str("/tmp/phase") or "unknown"
+    state = read_state(STATE_FILE)
+    phase = state.get("phase") or "unknown"
 
-    # In active phase, we should be ticking every minute (you write /tmp/last_tick each publish loop).
+    # In active phase, we should be ticking every minute (last_tick is updated each publish loop).
     if phase == "active":
-        last_tick = read_int("/tmp/last_tick")
+        last_tick = to_int(state.get("last_tick"))
         if last_tick is None:
             return 1
         # Allow some slack: 3 minutes
@@ -35,7 +39,7 @@ def main() -> int:
 
     # In sleep phase, we may intentionally not tick for hours. Use next_wake.
     if phase == "sleep":
-        next_wake = read_int("/tmp/next_wake")
+        next_wake = to_int(state.get("next_wake"))
         if next_wake is None:
             # If we don't know when we wake, treat as unhealthy
             return 1